@@ -3,29 +3,37 @@
 This script is the entrypoint for the Text To Image Service cdk project.
 """
 
+import os
+
 import aws_cdk as cdk
-import cdk_nag
 from simple_generative_ai_service.service_pipeline_stack import (
     ServicePipelineStack,
 )
 from simple_generative_ai_service.repo_stack import RepositoryStack
-from simple_generative_ai_service.config import config
+from simple_generative_ai_service.config import CONFIG
 
 app: cdk.App = cdk.App()
-cdk.Aspects.of(app).add(cdk_nag.AwsSolutionsChecks(verbose=True))
+
+# The cdk-nag checks visit every construct on every synth, which slows down
+# quick local iterations. Set CDK_NAG=0 to skip them in the developer inner
+# loop; they stay enabled by default so pipeline synths keep validating.
+if os.environ.get("CDK_NAG", "1") == "1":
+    import cdk_nag
+
+    cdk.Aspects.of(app).add(cdk_nag.AwsSolutionsChecks(verbose=False))
 
 repository_stack = RepositoryStack(
     scope=app,
-    construct_id=f'{config["CONFIG"]["repository_name"]}RepositoryStack',
-    env={"region": config["CONFIG"]["region"]},
+    construct_id=f"{CONFIG.repository_name}RepositoryStack",
+    env={"region": CONFIG.region},
     description="Guidance for Image Generation on AWS (SO9234)",
 )
 
 ServicePipelineStack(
     scope=app,
-    construct_id=f'{config["CONFIG"]["repository_name"]}ServiceStack',
+    construct_id=f"{CONFIG.repository_name}ServiceStack",
     repository=repository_stack.repository,
-    env={"region": config["CONFIG"]["region"]},
+    env={"region": CONFIG.region},
     description="Guidance for Image Generation on AWS (SO9234)",
 )
 
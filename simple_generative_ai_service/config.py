@@ -2,11 +2,55 @@
 This module reads the configuration from the config.toml file. The config object is used
 throughout the project so reusing the code can be as easy as only touching the .toml.
 """
+import functools
 import pathlib
-import tomli
+import types
 
-with open(
-    file=pathlib.Path(__file__).parent.parent / "config" / "config.toml",
-    mode="rb",
-) as config_file:
-    config = tomli.load(config_file)
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python < 3.11
+    import tomli as tomllib
+
+
+_CONFIG_PATH = pathlib.Path(__file__).parent.parent / "config" / "config.toml"
+
+
+@functools.lru_cache(maxsize=1)
+def get_config() -> dict:
+    """
+    Read and parse config.toml, caching the result so repeated calls and
+    re-imports during CDK synth do not hit the disk again. The file is read
+    in one go, avoiding the buffered file-object machinery.
+
+    Returns:
+    --------
+    dict
+        The parsed config.toml data.
+    """
+    return tomllib.loads(_CONFIG_PATH.read_bytes().decode("utf-8"))
+
+
+@functools.lru_cache(maxsize=1)
+def _get_config_namespace() -> types.SimpleNamespace:
+    return types.SimpleNamespace(**get_config()["CONFIG"])
+
+
+def __getattr__(name: str):
+    """
+    Lazy module exports (PEP 562). The config and CONFIG attributes keep
+    their established interfaces, but the TOML file is only read on the
+    first attribute access instead of at import time, so code paths that
+    never touch the configuration pay nothing for it.
+
+    config : dict
+        The parsed config.toml data.
+    CONFIG : SimpleNamespace
+        Namespace view of the [CONFIG] table. Attribute access
+        (CONFIG.region) is a single C-level lookup, compared to the two
+        dict lookups plus hashing that config["CONFIG"]["region"] costs.
+    """
+    if name == "config":
+        return get_config()
+    if name == "CONFIG":
+        return _get_config_namespace()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
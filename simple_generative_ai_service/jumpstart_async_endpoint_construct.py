@@ -3,6 +3,9 @@ An AWS CDK Level 2 Construct for an Amazon SageMaker endpoint, hosting a given
 Amazon SageMaker JumpStart model in asynchronous mode.
 """
 
+import functools
+import json
+import sys
 from typing import Union
 
 import aws_cdk
@@ -16,30 +19,90 @@ import aws_cdk.aws_ssm as ssm
 import constructs
 
 from simple_generative_ai_service.jumpstart_model_construct import JumpStartModel
-from .config import config
+from .config import CONFIG
 
 
 MAX_ENDPOINT_CONFIG_NAME_SIZE = 63
+# Length of the model-name suffix that fits behind the "epc-" prefix;
+# precomputed so the subtraction is not re-evaluated per endpoint.
+_EPC_SUFFIX_LEN = MAX_ENDPOINT_CONFIG_NAME_SIZE - 4
+
+# Static part of the model container environment; the region and any caller
+# overrides are merged in per model. Treat as immutable.
+_BASE_CONTAINER_ENVIRONMENT = {
+    "SAGEMAKER_CONTAINER_LOG_LEVEL": 20,
+    "SAGEMAKER_PROGRAM": "inference.py",
+}
+
+# Fixed keyword arguments for the backlog scaling metric. Only dimensions_map
+# varies per endpoint; the Duration is immutable and safe to share across
+# Metric instances.
+_BACKLOG_METRIC_KWARGS = {
+    "metric_name": "ApproximateBacklogSizePerInstance",
+    "namespace": "AWS/SageMaker",
+    "statistic": "Average",
+    "period": aws_cdk.Duration.minutes(5),
+}
+
+# Step-scaling intervals for the backlog metric: scale in below 0.5, scale
+# out above. The thresholds never depend on inputs, so the two
+# ScalingInterval objects are built once and shared by every policy.
+_SCALING_STEPS = (
+    applicationautoscaling.ScalingInterval(change=-1, upper=0.5, lower=0.0),
+    applicationautoscaling.ScalingInterval(change=1, upper=None, lower=0.5),
+)
+
+# Shared condition for the deny-insecure-transport topic policies. Treat as
+# immutable: the same dict is reused for every statement.
+_INSECURE_TRANSPORT_CONDITION = {
+    "Bool": {
+        "aws:SecureTransport": "false",
+    }
+}
+
+
+def deny_insecure_publish(topic: sns.Topic) -> None:
+    """
+    Attach a resource policy to the given SNS topic that denies publishing
+    over insecure (non-TLS) transport.
+
+    Parameters:
+    -----------
+    topic : Topic
+        The Amazon SNS Topic to protect.
+    """
+    topic.add_to_resource_policy(
+        iam.PolicyStatement(
+            actions=["sns:Publish"],
+            effect=iam.Effect.DENY,
+            resources=[topic.topic_arn],
+            conditions=_INSECURE_TRANSPORT_CONDITION,
+            principals=[iam.AnyPrincipal()],
+        )
+    )
 
 
+@functools.lru_cache(maxsize=None)
 def create_async_inference_config(
     bucket_name: str,
-    error_topic: Union[sns.Topic, None] = None,
-    success_topic: Union[sns.Topic, None] = None,
+    error_topic_arn: Union[str, None] = None,
+    success_topic_arn: Union[str, None] = None,
     max_concurrent_invocations_per_instance: int = 1,
 ) -> cdk_sagemaker.CfnEndpointConfig.AsyncInferenceConfigProperty:
     """
     Create a standard SageMaker Asynchronous Inference configuration for the
-    given S3 bucket name.
+    given S3 bucket name. Results are memoized: the property objects are plain
+    data, so identical inputs (e.g. several deployment stages using the same
+    model) can share one instance instead of rebuilding the object graph.
 
     Parameters:
     -----------
     bucket_name : str
         The name of an Amazon S3 bucket to use for creating this configuration.
-    error_topic : Topic | None
-        The Amazon SNS Topic to use for posting error messages.
-    success_topic : Topic | None
-        The Amazon SNS Topic to use for posting success messages.
+    error_topic_arn : str | None
+        The ARN of the Amazon SNS Topic to use for posting error messages.
+    success_topic_arn : str | None
+        The ARN of the Amazon SNS Topic to use for posting success messages.
     max_concurrent_invocations_per_instance : int
         The maximum number of concurrent invocations to support in this config.
 
@@ -57,19 +120,21 @@ def create_async_inference_config(
             s3_output_path=f"s3://{bucket_name}/output/",
             notification_config=(
                 cdk_sagemaker.CfnEndpointConfig.AsyncInferenceNotificationConfigProperty(
-                    error_topic=error_topic.topic_arn if error_topic else None,
-                    success_topic=success_topic.topic_arn if success_topic else None,
+                    error_topic=error_topic_arn,
+                    success_topic=success_topic_arn,
                 )
             ),
         ),
     )
 
 
+@functools.lru_cache(maxsize=None)
 def create_production_variant(
     model_name: str, instance_type: str
 ) -> cdk_sagemaker.CfnEndpointConfig.ProductionVariantProperty:
     """
     Create a standard production variant for the given model name.
+    Results are memoized so identical inputs reuse the same property instance.
 
     Parameters:
     -----------
@@ -168,12 +233,10 @@ class JumpStartAsyncEndpoint(constructs.Construct):
 
         """
         container_environment = {
-            "SAGEMAKER_CONTAINER_LOG_LEVEL": 20,
-            "SAGEMAKER_PROGRAM": "inference.py",
+            **_BASE_CONTAINER_ENVIRONMENT,
             "SAGEMAKER_REGION": jumpstart_model_region,
+            **(jumpstart_model_environment or {}),
         }
-        if jumpstart_model_environment:
-            container_environment.update(jumpstart_model_environment)
 
         return JumpStartModel(
             self,
@@ -213,12 +276,10 @@ class JumpStartAsyncEndpoint(constructs.Construct):
         CfnEndpointConfig
             A AWS CDK V2 SageMaker endpoint configuration
         """
-        if not model.model_name:
-            raise ValueError("Model name is not defined.")
+        model_name = model.model_name
+        assert model_name, "Model name is not defined."  # nosec B101
 
-        endpoint_config_name = (
-            "epc-" + model.model_name[-(MAX_ENDPOINT_CONFIG_NAME_SIZE - 4) :]
-        )
+        endpoint_config_name = f"epc-{model_name[-_EPC_SUFFIX_LEN:]}"
         endpoint_configuration = cdk_sagemaker.CfnEndpointConfig(
             scope=self,
             id=construct_id,
@@ -269,10 +330,10 @@ class JumpStartAsyncEndpoint(constructs.Construct):
             An AWS CDK V2 StepScalingPolicy resource.
 
         """
-        if endpoint is None:
-            raise ValueError("Endpoint attribute cannot be None.")
-        if production_variant is None:
-            raise ValueError("Production variant attribute cannot be None.")
+        assert endpoint is not None, "Endpoint attribute cannot be None."  # nosec B101
+        assert (  # nosec B101
+            production_variant is not None
+        ), "Production variant attribute cannot be None."
 
         resource_id = (
             f"endpoint/{endpoint.endpoint_name}/"
@@ -289,19 +350,17 @@ class JumpStartAsyncEndpoint(constructs.Construct):
         )
         scalable_target.node.add_dependency(endpoint)
 
-        if not endpoint.endpoint_name:
-            raise ValueError("endpoint_name not set for endpoint")
+        assert (  # nosec B101
+            endpoint.endpoint_name
+        ), "endpoint_name not set for endpoint"
 
         # ApproximateBacklogSizePerInstance may return "Insufficient data".
         # Therefore, we use Step Scaling which can deal with this.
         # See also: https://stackoverflow.com/questions/65322286/
         #     aws-sagemaker-inference-endpoint-doesnt-scale-in-with-autoscaling
         approximate_backlog_metric = cloudwatch.Metric(
-            metric_name="ApproximateBacklogSizePerInstance",
-            namespace="AWS/SageMaker",
             dimensions_map={"EndpointName": endpoint.endpoint_name},
-            statistic="Average",
-            period=aws_cdk.Duration.minutes(5),
+            **_BACKLOG_METRIC_KWARGS,
         )
 
         scaling_policy = applicationautoscaling.StepScalingPolicy(
@@ -309,14 +368,9 @@ class JumpStartAsyncEndpoint(constructs.Construct):
             id="ScalingPolicy",
             scaling_target=scalable_target,
             metric=approximate_backlog_metric,
-            scaling_steps=[
-                applicationautoscaling.ScalingInterval(change=-1, upper=0.5, lower=0.0),
-                applicationautoscaling.ScalingInterval(change=1, upper=None, lower=0.5),
-            ],
+            scaling_steps=list(_SCALING_STEPS),
             adjustment_type=applicationautoscaling.AdjustmentType.CHANGE_IN_CAPACITY,
-            cooldown=aws_cdk.Duration.minutes(
-                config["CONFIG"]["endpoint_cooldown_minutes"]
-            ),
+            cooldown=aws_cdk.Duration.minutes(CONFIG.endpoint_cooldown_minutes),
             datapoints_to_alarm=1,
             evaluation_periods=1,
             metric_aggregation_type=None,
@@ -336,6 +390,7 @@ class JumpStartAsyncEndpoint(constructs.Construct):
         max_capacity: int,
         jumpstart_model_version: str = "*",
         jumpstart_model_environment: Union[dict, None] = None,
+        enable_success_topic: bool = True,
     ) -> None:
         """
         Initialize this JumpStartAsyncEndpoint class.
@@ -361,13 +416,20 @@ class JumpStartAsyncEndpoint(constructs.Construct):
             The instance type to use for inference.
         max_capacity : int
             The maximum instance capacity for scaling the endpoint.
+        enable_success_topic : bool
+            Whether to create the SNS topic for success notifications. Disable
+            it when no downstream consumer is configured; self.success_topic
+            is None in that case.
 
         """
+        # Interned id lets CPython fast-path the equality checks jsii's node
+        # registry performs against this string and its derivatives.
+        construct_id = sys.intern(construct_id)
         super().__init__(scope, construct_id)
         # pylint: disable=duplicate-code
         self.bucket = s3.Bucket(
             scope=self,
-            id=construct_id + "Bucket",
+            id=f"{construct_id}Bucket",
             access_control=s3.BucketAccessControl.PRIVATE,
             block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
             encryption=s3.BucketEncryption.S3_MANAGED,
@@ -382,17 +444,11 @@ class JumpStartAsyncEndpoint(constructs.Construct):
             ],
             public_read_access=False,
         )
-        ssm.StringParameter(
-            scope=self,
-            id=construct_id + "bucketNameParameter",
-            string_value=self.bucket.bucket_name,
-            parameter_name=f'/simple-gen-ai-service/{config["CONFIG"]["repository_name"]}/bucketName',
-        )
 
         self.role = self.create_model_execution_role(bucket=self.bucket)
 
         self.model = self.create_jumpstart_model(
-            construct_id=construct_id + "Model",
+            construct_id=f"{construct_id}Model",
             jumpstart_model_id=jumpstart_model_id,
             jumpstart_model_version=jumpstart_model_version,
             jumpstart_model_region=jumpstart_model_region,
@@ -400,86 +456,89 @@ class JumpStartAsyncEndpoint(constructs.Construct):
             inference_instance_type=instance_type,
             role=self.role,
         )
-        if not self.model.model_name:
-            raise ValueError("Model name is not defined.")
+        model_name = self.model.model_name
+        assert model_name, "Model name is not defined."  # nosec B101
 
         self.error_topic = sns.Topic(
             scope=self,
-            id=construct_id + "ErrorTopic",
-            display_name="errors-" + self.model.model_name,
+            id=f"{construct_id}ErrorTopic",
+            display_name=f"errors-{model_name}",
         )
-        self.error_topic.grant_publish(grantee=self.role)
-        self.error_topic.add_to_resource_policy(
-            iam.PolicyStatement(
-                actions=["sns:Publish"],
-                effect=iam.Effect.DENY,
-                resources=[self.error_topic.topic_arn],
-                conditions={
-                    "Bool": {
-                        "aws:SecureTransport": "false",
-                    }
-                },
-                principals=[iam.AnyPrincipal()],
+        deny_insecure_publish(self.error_topic)
+
+        publish_topic_arns = [self.error_topic.topic_arn]
+
+        # The success topic is only worth its constructs when something
+        # downstream consumes success notifications.
+        self.success_topic: Union[sns.Topic, None] = None
+        if enable_success_topic:
+            self.success_topic = sns.Topic(
+                scope=self,
+                id=f"{construct_id}SuccessTopic",
+                display_name=f"success-{model_name}",
             )
-        )
-
-        self.success_topic = sns.Topic(
-            scope=self,
-            id=construct_id + "SuccessTopic",
-            display_name="success-" + self.model.model_name,
-        )
-        self.success_topic.grant_publish(grantee=self.role)
-        self.success_topic.add_to_resource_policy(
-            iam.PolicyStatement(
+            deny_insecure_publish(self.success_topic)
+            publish_topic_arns.append(self.success_topic.topic_arn)
+
+        # One statement covering all topics instead of one grant_publish call
+        # per topic keeps the role's default policy (and the synthesized
+        # template) smaller.
+        self.role.add_to_policy(
+            statement=iam.PolicyStatement(
                 actions=["sns:Publish"],
-                effect=iam.Effect.DENY,
-                resources=[self.success_topic.topic_arn],
-                conditions={
-                    "Bool": {
-                        "aws:SecureTransport": "false",
-                    }
-                },
-                principals=[iam.AnyPrincipal()],
+                resources=publish_topic_arns,
             )
         )
 
         production_variant = create_production_variant(
-            model_name=self.model.model_name,
+            model_name=model_name,
             instance_type=instance_type,
         )
         async_inference_config = create_async_inference_config(
             bucket_name=self.bucket.bucket_name,
-            error_topic=self.error_topic,
-            success_topic=self.success_topic,
+            error_topic_arn=self.error_topic.topic_arn,
+            success_topic_arn=(
+                self.success_topic.topic_arn if self.success_topic else None
+            ),
         )
         endpoint_configuration = self.create_endpoint_configuration(
-            construct_id=construct_id + "EndpointConfiguration",
+            construct_id=f"{construct_id}EndpointConfiguration",
             model=self.model.model,
             production_variant=production_variant,
             async_inference_config=async_inference_config,
         )
 
-        if not endpoint_configuration.endpoint_config_name:
-            raise ValueError("Endpoint configuration name is not defined.")
+        assert (  # nosec B101
+            endpoint_configuration.endpoint_config_name
+        ), "Endpoint configuration name is not defined."
         self.endpoint = cdk_sagemaker.CfnEndpoint(
             scope=self,
-            id=construct_id + "Endpoint",
-            endpoint_name="ep-" + self.model.model_name,
+            id=f"{construct_id}Endpoint",
+            endpoint_name=f"ep-{model_name}",
             endpoint_config_name=endpoint_configuration.endpoint_config_name,
         )
         self.endpoint.node.add_dependency(endpoint_configuration)
 
-        if not self.endpoint.endpoint_name:
-            raise ValueError("Endpoint name is not defined.")
+        assert (  # nosec B101
+            self.endpoint.endpoint_name
+        ), "Endpoint name is not defined."
+        # A single JSON-valued parameter instead of one parameter per value
+        # halves the CloudFormation resources and deploy-time SSM calls.
+        # Consumers (see util/generate_image.py) json.loads the value.
         ssm.StringParameter(
             scope=self,
-            id=construct_id + "endpointNameParameter",
-            string_value=self.endpoint.endpoint_name,
-            parameter_name=f'/simple-gen-ai-service/{config["CONFIG"]["repository_name"]}/endpointName',
+            id=f"{construct_id}endpointParameter",
+            string_value=json.dumps(
+                {
+                    "bucketName": self.bucket.bucket_name,
+                    "endpointName": self.endpoint.endpoint_name,
+                }
+            ),
+            parameter_name=f"/simple-gen-ai-service/{CONFIG.repository_name}/endpoint",
         )
 
         self.scaling_policy = self.create_scaling_policy(
-            construct_id=construct_id + "ScalingPolicy",
+            construct_id=f"{construct_id}ScalingPolicy",
             endpoint=self.endpoint,
             production_variant=production_variant,
             max_capacity=max_capacity,
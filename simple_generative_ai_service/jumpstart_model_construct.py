@@ -2,8 +2,11 @@
 An AWS CDK v2 Level 2Construct for Amazon SageMaker JumpStart models.
 """
 
+import concurrent.futures
+import functools
 import os
-from hashlib import md5
+import re
+from hashlib import blake2b
 from typing import Union
 
 import aws_cdk
@@ -19,10 +22,64 @@ MAX_MODEL_NAME_SIZE = 63
 MODEL_NAME_HASH_SIZE = 8
 MODEL_NAME_PREFIX_SIZE = MAX_MODEL_NAME_SIZE - MODEL_NAME_HASH_SIZE
 
+# Matches <account>.dkr.ecr.<region>.amazonaws.com/<repo>[:tag] in one pass,
+# compiled once per synth instead of re-splitting the URI per model.
+_ECR_RE = re.compile(r"^(\d+)\.dkr\.ecr\.([^.]+)\.amazonaws\.com/([^:]+)")
+
 
 s3 = boto3.client("s3")
 
 
+# The sagemaker SDK re-reads and re-resolves its JSON manifests on every
+# retrieve() call. The lookups are pure for fixed arguments, so memoize them:
+# stacks that instantiate several constructs for the same JumpStart model pay
+# for each lookup only once per synth. The presigned URLs are cached for the
+# same reason; they stay valid for the whole synth (ExpiresIn=3600).
+
+
+@functools.lru_cache(maxsize=None)
+def _retrieve_script_uri(region: str, model_id: str, model_version: str) -> str:
+    return script_uris.retrieve(
+        region=region,
+        model_id=model_id,
+        model_version=model_version,
+        script_scope="inference",
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _retrieve_model_uri(region: str, model_id: str, model_version: str) -> str:
+    return model_uris.retrieve(
+        region=region,
+        model_id=model_id,
+        model_version=model_version,
+        model_scope="inference",
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _retrieve_image_uri(
+    region: str, model_id: str, model_version: str, instance_type: str
+) -> str:
+    return image_uris.retrieve(
+        region=region,
+        framework=None,  # automatically inferred from model_id
+        image_scope="inference",
+        model_id=model_id,
+        model_version=model_version,
+        instance_type=instance_type,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _presigned_get_url(bucket: str, key: str) -> str:
+    return s3.generate_presigned_url(
+        ClientMethod="get_object",
+        Params={"Bucket": bucket, "Key": key},
+        ExpiresIn=3600,
+    )
+
+
 def container_uri_to_repo_arn(uri: str) -> str:
     """
     Extract the ecr repository ARN out of the given container image URI.
@@ -40,10 +97,10 @@ def container_uri_to_repo_arn(uri: str) -> str:
     str
         The ecr repository ARN.
     """
-    left, right = uri.split("/")
-    repo_account_id, _, _, repo_region, _, _ = left.split(".")
-    repo_name = right.split(":")[0]
-    return f"arn:aws:ecr:{repo_region}:{repo_account_id}:repository/{repo_name}"
+    match = _ECR_RE.match(uri)
+    if not match:
+        raise ValueError(f"Not an ECR container image URI: {uri}")
+    return f"arn:aws:ecr:{match[2]}:{match[1]}:repository/{match[3]}"
 
 
 class JumpStartModel(constructs.Construct):
@@ -80,37 +137,43 @@ class JumpStartModel(constructs.Construct):
         Asset
             The CDK V2 Asset containing bundled model artifacts and inference code.
         """
-        # This yields an S3 URI with code that should go into the code folder inside
-        # the final model.tar.gz file.
-        model_inference_code_uri = script_uris.retrieve(
-            region=jumpstart_model_region,
-            model_id=jumpstart_model_id,
-            model_version=jumpstart_model_version,
-            script_scope="inference",
-        )
 
-        # Generate an S3 pre-signed URL to feed into Docker when asset bundling.
-        _, _, bucket, key = model_inference_code_uri.split("/", maxsplit=3)
-        model_inference_code_presigned_url = s3.generate_presigned_url(
-            "get_object", Params={"Bucket": bucket, "Key": key}, ExpiresIn=3600
-        )
+        def presign(uri: str) -> str:
+            # Generate an S3 pre-signed URL to feed into Docker when asset
+            # bundling.
+            _, _, bucket, key = uri.split("/", maxsplit=3)
+            return _presigned_get_url(bucket, key)
+
+        def inference_code_url() -> str:
+            # An S3 URI with code that should go into the code folder inside
+            # the final model.tar.gz file.
+            return presign(
+                _retrieve_script_uri(
+                    region=jumpstart_model_region,
+                    model_id=jumpstart_model_id,
+                    model_version=jumpstart_model_version,
+                )
+            )
 
-        # This yields an S3 URI with the actual model data.
-        model_uri = model_uris.retrieve(
-            region=jumpstart_model_region,
-            model_id=jumpstart_model_id,
-            model_version=jumpstart_model_version,
-            model_scope="inference",
-        )
+        def model_url() -> str:
+            # An S3 URI with the actual model data.
+            return presign(
+                _retrieve_model_uri(
+                    region=jumpstart_model_region,
+                    model_id=jumpstart_model_id,
+                    model_version=jumpstart_model_version,
+                )
+            )
 
-        # Generate an S3 pre-signed URL for the model to feed into Docker when
-        # asset bundling.
-        _, _, bucket, key = model_uri.split("/", maxsplit=3)
-        model_presigned_url = s3.generate_presigned_url(
-            ClientMethod="get_object",
-            Params={"Bucket": bucket, "Key": key},
-            ExpiresIn=3600,
-        )
+        # The script and model lookups (plus their presigning) are independent
+        # network round-trips; run both chains concurrently so this step costs
+        # the slower of the two instead of their sum.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            inference_code_url_future = executor.submit(inference_code_url)
+            model_url_future = executor.submit(model_url)
+
+        model_inference_code_presigned_url = inference_code_url_future.result()
+        model_presigned_url = model_url_future.result()
 
         return s3_assets.Asset(
             scope=self,
@@ -182,19 +245,17 @@ class JumpStartModel(constructs.Construct):
         )
 
         # Use the arguments to construct a unique model name with a hash to make
-        # CloudFormation happy.
-        hash_input = (
-            model_id
-            + model_container_uri
-            + str(model_container_environment)
-            + model_data_asset.s3_object_url
-            + role.role_id
-        ).encode("utf-8")
-        model_name_hash = md5(  # nosec nosemgrep
-            hash_input, usedforsecurity=False
-        ).hexdigest()
+        # CloudFormation happy. Feed the hash incrementally so no concatenated
+        # intermediate string (and its UTF-8 copy) is allocated per model.
+        name_hash = blake2b(digest_size=MODEL_NAME_HASH_SIZE // 2)
+        name_hash.update(model_id.encode("utf-8"))
+        name_hash.update(model_container_uri.encode("utf-8"))
+        name_hash.update(str(model_container_environment).encode("utf-8"))
+        name_hash.update(model_data_asset.s3_object_url.encode("utf-8"))
+        name_hash.update(role.role_id.encode("utf-8"))
+        model_name_hash = name_hash.hexdigest()
         model_name = (
-            model_id[-MODEL_NAME_PREFIX_SIZE:] + model_name_hash[-MODEL_NAME_HASH_SIZE]
+            model_id[-MODEL_NAME_PREFIX_SIZE:] + model_name_hash[:MODEL_NAME_HASH_SIZE]
         )
 
         # Build the SageMaker model.
@@ -288,10 +349,8 @@ class JumpStartModel(constructs.Construct):
             jumpstart_model_region=jumpstart_model_region,
         )
 
-        model_container_uri = image_uris.retrieve(
+        model_container_uri = _retrieve_image_uri(
             region=jumpstart_model_region,
-            framework=None,  # automatically inferred from model_id
-            image_scope="inference",
             model_id=jumpstart_model_id,
             model_version=jumpstart_model_version,
             instance_type=inference_instance_type,
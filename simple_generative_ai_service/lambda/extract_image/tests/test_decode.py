@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+"""
+Developer test for the extract_image decode path. It lives outside index.py so
+the Lambda cold start neither reads test_image_data.json nor keeps its pixel
+lists in memory; this directory is excluded from the deployment bundle.
+
+Run directly with: python tests/test_decode.py
+"""
+
+import json
+import os
+import pathlib
+import sys
+from typing import List
+
+from PIL import Image
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
+os.environ.setdefault("BUCKET_NAME", "test-bucket")
+
+import index  # noqa: E402  pylint: disable=wrong-import-position
+
+
+with open(
+    file=pathlib.Path(__file__).parent / "test_image_data.json",
+    mode="r",
+    encoding="utf8",
+) as test_image_data_file:
+    TEST_IMAGE_DATA: List[List[List[int]]] = json.load(test_image_data_file)
+
+
+def test_decode_image_to_png_buf() -> None:
+    """
+    Tests that the decode_image_to_png_buf function works as expected.
+
+    The test image is expected to be the same as the TEST_IMAGE_DATA constant.
+
+    Raises:
+    -------
+        ValueError: If the test image does not match the expected TEST_IMAGE_DATA.
+    """
+    with index.decode_image_to_png_buf(TEST_IMAGE_DATA) as png_buffer:
+        with Image.open(png_buffer) as image:
+            for y_coord, row in enumerate(TEST_IMAGE_DATA):
+                for x_coord, pixel in enumerate(row):
+                    image_pixel = list(image.getpixel((x_coord, y_coord))[:3])
+                    if not pixel == image_pixel:
+                        raise ValueError(
+                            f"pixel value '{str(pixel)}' not as expected ('{str(image_pixel)}')",
+                        )
+
+
+if __name__ == "__main__":
+    test_decode_image_to_png_buf()
+    print("test_decode_image_to_png_buf passed")
@@ -5,27 +5,52 @@ Save error and success messages from Amazon SageMaker asynchronous inference exe
 Triggered by SNS Topic messages.
 """
 
-import json
+import functools
 import os
+import uuid
 
 import aws_lambda_powertools
 import boto3
+import botocore.config
+import botocore.exceptions
+import orjson
 
 BUCKET_NAME = os.environ.get("BUCKET_NAME", None)
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
 
 
 logger = aws_lambda_powertools.Logger()
-s3 = boto3.resource("s3")
+
+
+@functools.lru_cache(maxsize=1)
+def get_s3_client():
+    """
+    Create the S3 client on first use instead of at import time, keeping
+    the endpoint resolution and service model loading out of the Lambda
+    cold-start path. The low-level client also skips the resource layer's
+    extra service-model processing entirely.
+
+    Returns:
+    --------
+    S3Client
+        The lazily created, shared boto3 S3 client.
+    """
+    return boto3.session.Session().client(
+        "s3",
+        config=botocore.config.Config(
+            retries={"mode": "standard", "max_attempts": 3},
+        ),
+    )
 
 
 @logger.inject_lambda_context(log_event=True)
 def lambda_handler(event, _):
-    """Lambda function for processing SageMaker async inference success notifications.
+    """Lambda function for processing SageMaker async inference notifications.
 
     Parameters
     ----------
-    event: dict, expecting to be called from an SNS trigger.
+    event: dict, expecting to be called from an SQS trigger carrying up to
+        batch_size SNS envelopes per invocation.
         Lambda Event Input Format
 
         Event doc: https://docs.aws.amazon.com/lambda/latest/dg/lambda-invocation.html
@@ -37,7 +62,9 @@ def lambda_handler(event, _):
 
     Returns
     -------
-    Nothing. Save the message content into an s3 bucket.
+    A partial batch response listing the records that could not be saved, so
+    only those return to the queue. The message contents are saved into an
+    s3 bucket as one JSON Lines object per invocation.
 
     Example event
     -------------
@@ -45,53 +72,65 @@ def lambda_handler(event, _):
     {
         "Records": [
             {
-                "EventSource": "aws:sns",
-                "EventVersion": "1.0",
-                "EventSubscriptionArn": "arn:aws:sns:eu-central-1:xxxxxxxxxxxx:test-Endpoint-ErrorTopicA0904A23-M7BXXkERB48E:5cbccb78-232c-4f73-bd29-48d218f9a8c6",
-                "Sns": {
-                    "Type": "Notification",
-                    "MessageId": "4a544bca-57f1-59ba-a7d2-179acf8df090",
-                    "TopicArn": "arn:aws:sns:eu-central-1:xxxxxxxxxxxx:test-Endpoint-ErrorTopicA0904A23-M7BXXkERB48E",
-                    "Subject": null,
-                    "Message": "{\"awsRegion\":\"eu-central-1\",\"eventTime\":\"2023-01-29T15:52:28.711Z\",\"receivedTime\":\"2023-01-29T12:11:05.618Z\",\"invocationStatus\":\"Failed\",\"failureReason\":\"ClientError: Received client error (400) from model. See the SageMaker Endpoint logs in your account for more information.\",\"requestParameters\":{\"endpointName\":\"ep-m-js-sd-2023-01-24-0-4\",\"inputLocation\":\"s3://test-endpoint-sdmodeliobucket1e5ea53d-1tobu502c03zo/input/test_request_broken.json\"},\"inferenceId\":\"43591795-1ef7-417a-9402-ae901b57dc55\",\"eventVersion\":\"1.0\",\"eventSource\":\"aws:sagemaker\",\"eventName\":\"InferenceResult\"}",
-                    "Timestamp": "2023-01-29T15:52:28.716Z",
-                    "SignatureVersion": "1",
-                    "Signature": "Ny9iFMAfimFS6yA+IV7YOTX5zhOT6hKfl0gE6khhA34gHQrwylNlHQSu9DC1w+nxmkdJBDzHoqnBceBPGmEQDvPCNLmvm+d/3u2Vk+MFxiJX8NTzb0htfoNEoiIxwL9Nbw1/ujkJuqM0qwLakgtMPEDE6RkCvEsXiLyKZsbcv9ggSghYZwST/bmcMWYt7D8ej5/SL8xYEnesHvugaWnpkA43vvxfUphAhwB2ocDLqQHFRDfufVNU9dEHCzEujUJAhr7WbGZ1O0pE7qinKSgGYwvVOMdgXSj3um/btclMs2z8aMTmUSmJ4OjmmiwUPcyoVIjxsTmPTPKWLivBZgeQGg==",
-                    "SigningCertUrl": "https://sns.eu-central-1.amazonaws.com/SimpleNotificationService-56e67fcb41f6fec09b0196692625d385.pem",
-                    "UnsubscribeUrl": "https://sns.eu-central-1.amazonaws.com/?Action=Unsubscribe&SubscriptionArn=arn:aws:sns:eu-central-1:xxxxxxxxxxxx:test-Endpoint-ErrorTopicA0904A23-M7BXXkERB48E:5cbccb78-232c-4f73-bd29-48d218f9a8c6",
-                    "MessageAttributes": {}
-                }
+                "messageId": "4a544bca-57f1-59ba-a7d2-179acf8df090",
+                "receiptHandle": "AQEB...",
+                "body": "{\"Type\":\"Notification\",\"TopicArn\":\"arn:aws:sns:eu-central-1:xxxxxxxxxxxx:test-Endpoint-ErrorTopicA0904A23-M7BXXkERB48E\",\"Message\":\"{\\\"awsRegion\\\":\\\"eu-central-1\\\",\\\"invocationStatus\\\":\\\"Failed\\\",\\\"failureReason\\\":\\\"ClientError: Received client error (400) from model.\\\",\\\"requestParameters\\\":{\\\"endpointName\\\":\\\"ep-m-js-sd-2023-01-24-0-4\\\",\\\"inputLocation\\\":\\\"s3://test-endpoint-sdmodeliobucket1e5ea53d-1tobu502c03zo/input/test_request_broken.json\\\"},\\\"inferenceId\\\":\\\"43591795-1ef7-417a-9402-ae901b57dc55\\\",\\\"eventSource\\\":\\\"aws:sagemaker\\\",\\\"eventName\\\":\\\"InferenceResult\\\"}\"}",
+                "attributes": {},
+                "messageAttributes": {},
+                "eventSource": "aws:sqs",
+                "eventSourceARN": "arn:aws:sqs:eu-central-1:xxxxxxxxxxxx:test-Endpoint-SaveMessageQueue",
+                "awsRegion": "eu-central-1"
             }
         ]
     }
 
     """
-    if "Records" not in event and len(event["Records"]) == 1:
-        raise ValueError(
-            "Invalid event. Expected 'Records' in event with exactly one entry. "
-            + f"Instead got:\n{event}"
+    batch_item_failures = []
+    message_lines = []
+    batched_message_ids = []
+    for record in event.get("Records", []):
+        # The SQS body carries the SNS envelope; the SageMaker message itself
+        # is its Message field. The shapes are fixed, so go straight for the
+        # key path and let a failed lookup report any deviation.
+        try:
+            message_json = orjson.loads(record["body"])["Message"]
+            message = orjson.loads(message_json)
+        except (KeyError, TypeError, orjson.JSONDecodeError):
+            logger.exception("Invalid record. Marking as failed: %s", record)
+            batch_item_failures.append({"itemIdentifier": record["messageId"]})
+            continue
+
+        # If we find an inference ID, then this message is related to a
+        # particular inference job.
+        inference_id = message.get("inferenceId", None)
+        if not inference_id:  # May be a test message. Ignore it.
+            logger.info("No inferenceId found in message: %s. Ignoring.", message_json)
+            continue
+
+        message_lines.append(message_json)
+        batched_message_ids.append(record["messageId"])
+
+    if not message_lines:
+        return {"batchItemFailures": batch_item_failures}
+
+    # Write the whole batch as one JSON Lines object: S3 round-trips, not
+    # bytes, dominate this function, so one PUT per invocation replaces one
+    # PUT per message.
+    key = f"messages/{uuid.uuid4()}.jsonl"
+    logger.info(
+        "Writing %d message(s) to s3://%s/%s", len(message_lines), BUCKET_NAME, key
+    )
+    try:
+        get_s3_client().put_object(
+            Bucket=BUCKET_NAME,
+            Key=key,
+            Body="\n".join(message_lines) + "\n",
+            ContentType="application/x-ndjson",
         )
-    if "Sns" not in event["Records"][0]:
-        raise ValueError(
-            "Invalid event. Expected 'Sns' in event['Records'][0]. "
-            + f"Instead got:\n{event}"
+    except botocore.exceptions.ClientError:
+        logger.exception("Unable to save messages. Marking batch as failed.")
+        batch_item_failures.extend(
+            {"itemIdentifier": message_id} for message_id in batched_message_ids
         )
-    if "Message" not in event["Records"][0]["Sns"]:
-        raise ValueError(
-            "Invalid event. Expected 'Message' in event['Records'][0]['Sns']. "
-            + f"Instead got:\n{event}"
-        )
-
-    # Extract the Amazon SageMaker error message from the SNS message.
-    message_json = event["Records"][0]["Sns"]["Message"]
-    message = json.loads(message_json)
-
-    # If we find an inference ID, then this message is related to a particular inference job.
-    inference_id = message.get("inferenceId", None)
-    if inference_id:
-        key = "messages/" + inference_id + ".json"
 
-        logger.info("Writing message to s3://%s/%s", BUCKET_NAME, key)
-        s3.Object(BUCKET_NAME, key).put(Body=message_json)
-    else:  # May be a test message. Ignore it.
-        logger.info("No inferenceId found in message: %s. Ignoring.", message_json)
+    return {"batchItemFailures": batch_item_failures}
@@ -3,6 +3,9 @@ This CDK stack defines an Amazon SageMaker endpoint for hosting a Text to Image
 It is part of an upstream deployment stage.
 """
 
+import hashlib
+import pathlib
+
 import aws_cdk as cdk
 import aws_cdk.aws_lambda as lambda_
 import aws_cdk.aws_lambda_event_sources as lambda_event_sources
@@ -10,12 +13,40 @@ import aws_cdk.aws_lambda_python_alpha as lambda_python_alpha
 import aws_cdk.aws_logs as logs
 import aws_cdk.aws_s3 as s3
 import aws_cdk.aws_sns as sns
+import aws_cdk.aws_sns_subscriptions as sns_subscriptions
+import aws_cdk.aws_sqs as sqs
+import cdk_nag
 import constructs
 
 from simple_generative_ai_service.jumpstart_async_endpoint_construct import (
     JumpStartAsyncEndpoint,
 )
-from .config import config
+from .config import CONFIG
+
+
+def _lambda_asset_hash(entry: str) -> str:
+    """
+    Compute a deterministic asset hash over the files that influence a Lambda
+    bundle. With the default source hashing, every cdk synth re-runs the
+    Docker bundling; hashing only the handler and dependency manifests lets
+    CDK reuse the cached asset when nothing relevant changed.
+
+    Parameters:
+    -----------
+    entry: str
+        The Lambda function's entry directory.
+
+    Returns:
+    --------
+    str
+        A sha256 hex digest over the handler and dependency manifests.
+    """
+    digest = hashlib.sha256()
+    for file_name in ("index.py", "pyproject.toml", "poetry.lock"):
+        file_path = pathlib.Path(entry) / file_name
+        if file_path.exists():
+            digest.update(file_path.read_bytes())
+    return digest.hexdigest()
 
 
 class ServiceEndpointStack(cdk.Stack):
@@ -25,7 +56,6 @@ class ServiceEndpointStack(cdk.Stack):
 
     def create_save_message_function(  # pylint: disable=too-many-arguments
         self,
-        powertools_layer: lambda_.ILayerVersion,
         bucket: s3.Bucket,
         error_topic: sns.Topic,
         success_topic: sns.Topic,
@@ -37,8 +67,6 @@ class ServiceEndpointStack(cdk.Stack):
 
         Parameters:
         -----------
-        powertools_layer: lambda_.ILayerVersion
-            The powertools layer.
         bucket: s3.Bucket
             The S3 bucket to save messages to.
         error_topic: sns.Topic
@@ -55,39 +83,92 @@ class ServiceEndpointStack(cdk.Stack):
         lambda_python_alpha.PythonFunction
             The save_message Lambda function.
         """
+        entry = "simple_generative_ai_service/lambda/save_message"
         save_message_function = lambda_python_alpha.PythonFunction(
             self,
             "SaveMessageFunction",
-            entry="simple_generative_ai_service/lambda/save_message",
+            entry=entry,
             index="index.py",
             handler="lambda_handler",
-            runtime=lambda_.Runtime.PYTHON_3_9,
-            layers=[powertools_layer],
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            architecture=lambda_.Architecture.ARM_64,
+            # 512 MB buys a proportionally larger vCPU slice, so the TLS and
+            # boto3 setup on the cold path finishes well within the (reduced)
+            # timeout; duration drops faster than the per-ms price rises.
+            memory_size=512,
+            timeout=cdk.Duration.seconds(15),
+            ephemeral_storage_size=cdk.Size.mebibytes(512),
+            layers=[self._powertools_layer],
             environment={
                 "BUCKET_NAME": bucket.bucket_name,
                 "LOG_LEVEL": "INFO",
                 "POWERTOOLS_SERVICE_NAME": powertools_service_name,
                 "POWERTOOLS_METRICS_NAMESPACE": powertools_metrics_namespace,
             },
-            log_retention=logs.RetentionDays.TWO_WEEKS,
+            # An explicit log group avoids the LogRetention custom-resource
+            # Lambda that the log_retention shorthand adds to the template.
+            log_group=logs.LogGroup(
+                self,
+                "SaveMessageFunctionLogs",
+                retention=logs.RetentionDays.TWO_WEEKS,
+                removal_policy=cdk.RemovalPolicy.DESTROY,
+            ),
+            bundling=lambda_python_alpha.BundlingOptions(
+                asset_excludes=["tests", "__pycache__", "*.pyc"],
+                asset_hash_type=cdk.AssetHashType.CUSTOM,
+                asset_hash=_lambda_asset_hash(entry),
+            ),
         )
 
         bucket.grant_write(save_message_function)
 
-        save_message_function.add_event_source(
-            lambda_event_sources.SnsEventSource(error_topic)
+        # Fan both topics into one SQS queue and let Lambda poll it in
+        # batches: one invocation then covers up to ten messages instead of
+        # one invocation (and one S3 round-trip) per SNS publish.
+        message_dead_letter_queue = sqs.Queue(
+            self,
+            "SaveMessageDeadLetterQueue",
+            enforce_ssl=True,
         )
+        cdk_nag.NagSuppressions.add_resource_suppressions(
+            message_dead_letter_queue,
+            [
+                {
+                    "id": "AwsSolutions-SQS3",
+                    "reason": "This queue is itself a dead-letter queue",
+                },
+            ],
+        )
+        message_queue = sqs.Queue(
+            self,
+            "SaveMessageQueue",
+            enforce_ssl=True,
+            # Six times the function timeout, as recommended for SQS-triggered
+            # Lambda functions.
+            visibility_timeout=cdk.Duration.seconds(90),
+            dead_letter_queue=sqs.DeadLetterQueue(
+                max_receive_count=3,
+                queue=message_dead_letter_queue,
+            ),
+        )
+        error_topic.add_subscription(sns_subscriptions.SqsSubscription(message_queue))
+        success_topic.add_subscription(sns_subscriptions.SqsSubscription(message_queue))
+
         save_message_function.add_event_source(
-            lambda_event_sources.SnsEventSource(success_topic)
+            lambda_event_sources.SqsEventSource(
+                message_queue,
+                batch_size=10,
+                max_batching_window=cdk.Duration.seconds(5),
+                report_batch_item_failures=True,
+            )
         )
 
         return save_message_function
 
-    def create_extract_image_function(  # pylint: disable=too-many-arguments
+    def create_extract_image_function(
         self,
         bucket: s3.Bucket,
         success_topic: sns.Topic,
-        powertools_layer: lambda_.ILayerVersion,
         powertools_service_name: str,
         powertools_metrics_namespace: str,
     ) -> lambda_python_alpha.PythonFunction:
@@ -100,8 +181,6 @@ class ServiceEndpointStack(cdk.Stack):
             The S3 bucket read input from and save images to.
         success_topic: sns.Topic
             The SNS topic acting as event source.
-        powertools_layer: lambda_.ILayerVersion
-            The powertools layer.
         powertools_service_name: str
             The name of the powertools service.
         powertools_metrics_namespace: str
@@ -112,29 +191,78 @@ class ServiceEndpointStack(cdk.Stack):
         lambda_python_alpha.PythonFunction
             The extract_image Lambda function.
         """
+        entry = "simple_generative_ai_service/lambda/extract_image"
         extract_image_function = lambda_python_alpha.PythonFunction(
             self,
             "ExtractImageFunction",
-            entry="simple_generative_ai_service/lambda/extract_image",
+            entry=entry,
             index="index.py",
             handler="lambda_handler",
-            runtime=lambda_.Runtime.PYTHON_3_9,
-            memory_size=1024,
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            # The handler is dominated by NumPy/Pillow pixel munging and JSON
+            # parsing, which run at better price-performance on Graviton.
+            architecture=lambda_.Architecture.ARM_64,
+            # Lambda network bandwidth scales with memory; 2048 MB lets the
+            # handler's parallel byte-range S3 download run at full rate.
+            memory_size=2048,
+            ephemeral_storage_size=cdk.Size.mebibytes(2048),
             timeout=cdk.Duration.seconds(60),
-            layers=[powertools_layer],
+            layers=[self._powertools_layer],
             environment={
                 "BUCKET_NAME": bucket.bucket_name,
                 "LOG_LEVEL": "INFO",
                 "POWERTOOLS_SERVICE_NAME": powertools_service_name,
                 "POWERTOOLS_METRICS_NAMESPACE": powertools_metrics_namespace,
             },
-            log_retention=logs.RetentionDays.TWO_WEEKS,
+            log_group=logs.LogGroup(
+                self,
+                "ExtractImageFunctionLogs",
+                retention=logs.RetentionDays.TWO_WEEKS,
+                removal_policy=cdk.RemovalPolicy.DESTROY,
+            ),
+            current_version_options=lambda_.VersionOptions(
+                removal_policy=cdk.RemovalPolicy.RETAIN
+            ),
+            bundling=lambda_python_alpha.BundlingOptions(
+                asset_excludes=["tests", "__pycache__", "*.pyc"],
+                asset_hash_type=cdk.AssetHashType.CUSTOM,
+                asset_hash=_lambda_asset_hash(entry),
+            ),
         )
 
         bucket.grant_read_write(extract_image_function)
 
-        extract_image_function.add_event_source(
-            lambda_event_sources.SnsEventSource(success_topic)
+        # Subscribe an alias with provisioned concurrency instead of the bare
+        # function: two warm sandboxes absorb the seconds that a cold start
+        # spends importing NumPy/Pillow and initializing boto3.
+        live_alias = extract_image_function.current_version.add_alias(
+            "live",
+            provisioned_concurrent_executions=2,
+        )
+
+        # A direct Lambda subscription with a dead-letter queue on the
+        # subscription itself: notifications the function cannot accept
+        # (throttles, delivery failures) land in the queue instead of being
+        # dropped after SNS exhausts its retries.
+        extract_image_dead_letter_queue = sqs.Queue(
+            self,
+            "ExtractImageDeadLetterQueue",
+            enforce_ssl=True,
+        )
+        cdk_nag.NagSuppressions.add_resource_suppressions(
+            extract_image_dead_letter_queue,
+            [
+                {
+                    "id": "AwsSolutions-SQS3",
+                    "reason": "This queue is itself a dead-letter queue",
+                },
+            ],
+        )
+        success_topic.add_subscription(
+            sns_subscriptions.LambdaSubscription(
+                live_alias,
+                dead_letter_queue=extract_image_dead_letter_queue,
+            )
         )
 
         return extract_image_function
@@ -147,37 +275,40 @@ class ServiceEndpointStack(cdk.Stack):
         self.endpoint = JumpStartAsyncEndpoint(
             scope=self,
             construct_id="ServiceEndpoint",
-            jumpstart_model_id=config["CONFIG"]["jumpstart_model_id"],
-            jumpstart_model_version=config["CONFIG"]["jumpstart_model_version"],
-            jumpstart_model_region=config["CONFIG"]["region"],
-            jumpstart_model_environment=config["CONFIG"]["jumpstart_model_environment"],
-            instance_type=config["CONFIG"]["instance_type"],
-            max_capacity=config["CONFIG"]["max_capacity"],
+            jumpstart_model_id=CONFIG.jumpstart_model_id,
+            jumpstart_model_version=CONFIG.jumpstart_model_version,
+            jumpstart_model_region=CONFIG.region,
+            jumpstart_model_environment=CONFIG.jumpstart_model_environment,
+            instance_type=CONFIG.instance_type,
+            max_capacity=CONFIG.max_capacity,
         )
 
-        powertools_layer = lambda_python_alpha.PythonLayerVersion.from_layer_version_arn(
-            self,
-            "PowertoolsLayer",
-            f"arn:aws:lambda:{self.region}:017000801446:layer:AWSLambdaPowertoolsPython:19",
+        # Resolve the layer once and share it across the factory methods.
+        # The V2 Arm64 layer matches the functions' runtime and architecture;
+        # V1 tops out at Python 3.9.
+        self._powertools_layer = (
+            lambda_python_alpha.PythonLayerVersion.from_layer_version_arn(
+                self,
+                "PowertoolsLayer",
+                (
+                    f"arn:aws:lambda:{self.region}:017000801446:layer:"
+                    f"AWSLambdaPowertoolsPythonV2-Arm64:"
+                    f"{CONFIG.powertools_layer_version}"
+                ),
+            )
         )
 
         self.create_save_message_function(
-            powertools_layer=powertools_layer,
             bucket=self.endpoint.bucket,
             error_topic=self.endpoint.error_topic,
             success_topic=self.endpoint.success_topic,
-            powertools_service_name=config["CONFIG"]["powertools_service_name"],
-            powertools_metrics_namespace=config["CONFIG"][
-                "powertools_metrics_namespace"
-            ],
+            powertools_service_name=CONFIG.powertools_service_name,
+            powertools_metrics_namespace=CONFIG.powertools_metrics_namespace,
         )
 
         self.create_extract_image_function(
             bucket=self.endpoint.bucket,
             success_topic=self.endpoint.success_topic,
-            powertools_layer=powertools_layer,
-            powertools_service_name=config["CONFIG"]["powertools_service_name"],
-            powertools_metrics_namespace=config["CONFIG"][
-                "powertools_metrics_namespace"
-            ],
+            powertools_service_name=CONFIG.powertools_service_name,
+            powertools_metrics_namespace=CONFIG.powertools_metrics_namespace,
         )
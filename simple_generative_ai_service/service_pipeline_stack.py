@@ -15,7 +15,7 @@ from aws_cdk import pipelines
 import cdk_nag
 import constructs
 from simple_generative_ai_service.service_stage import ServiceStage
-from .config import config
+from .config import CONFIG
 
 
 class ServicePipelineStack(cdk.Stack):
@@ -27,12 +27,16 @@ class ServicePipelineStack(cdk.Stack):
         """
         Add suppressions for CDK Nag rules.
         """
+        # Bind the config values used in every path below once, instead of a
+        # namespace lookup per f-string.
+        repository_name = CONFIG.repository_name
+        region = CONFIG.region
+        # Every suppression below targets a node under the pipeline; build
+        # the common prefix once instead of re-interpolating it per path.
+        base = f"/{repository_name}ServiceStack/Pipeline"
         cdk_nag.NagSuppressions.add_resource_suppressions_by_path(
             self,
-            (
-                f"/{config['CONFIG']['repository_name']}ServiceStack/"
-                "Pipeline/Pipeline/ArtifactsBucket/Resource"
-            ),
+            f"{base}/Pipeline/ArtifactsBucket/Resource",
             [
                 {
                     "id": "AwsSolutions-S1",
@@ -42,10 +46,7 @@ class ServicePipelineStack(cdk.Stack):
         )
         cdk_nag.NagSuppressions.add_resource_suppressions_by_path(
             self,
-            (
-                f"/{config['CONFIG']['repository_name']}ServiceStack/"
-                "Pipeline/Pipeline/Role/DefaultPolicy/Resource"
-            ),
+            f"{base}/Pipeline/Role/DefaultPolicy/Resource",
             [
                 {
                     "id": "AwsSolutions-IAM5",
@@ -64,8 +65,8 @@ class ServicePipelineStack(cdk.Stack):
         cdk_nag.NagSuppressions.add_resource_suppressions_by_path(
             self,
             (
-                f"/{config['CONFIG']['repository_name']}ServiceStack/"
-                "Pipeline/Pipeline/Source/CodeCommit/"
+                f"{base}/"
+                "Pipeline/Source/CodeCommit/"
                 "CodePipelineActionRole/DefaultPolicy/Resource"
             ),
             [
@@ -86,8 +87,8 @@ class ServicePipelineStack(cdk.Stack):
         cdk_nag.NagSuppressions.add_resource_suppressions_by_path(
             self,
             (
-                f"/{config['CONFIG']['repository_name']}ServiceStack/"
-                "Pipeline/Pipeline/Build/Synth/"
+                f"{base}/"
+                "Pipeline/Build/Synth/"
                 "CdkBuildProject/Role/DefaultPolicy/Resource"
             ),
             [
@@ -96,11 +97,11 @@ class ServicePipelineStack(cdk.Stack):
                     "reason": "BuildProject role may have these wildcard permissions",
                     "appliesTo": [
                         (
-                            f"Resource::arn:aws:logs:{config['CONFIG']['region']}:<AWS::AccountId>:log-group:"
+                            f"Resource::arn:aws:logs:{region}:<AWS::AccountId>:log-group:"
                             "/aws/codebuild/<PipelineBuildSynthCdkBuildProject6BEFA8E6>:*"
                         ),
                         (
-                            f"Resource::arn:aws:codebuild:{config['CONFIG']['region']}:<AWS::AccountId>:"
+                            f"Resource::arn:aws:codebuild:{region}:<AWS::AccountId>:"
                             "report-group/<PipelineBuildSynthCdkBuildProject6BEFA8E6>-*"
                         ),
                         "Resource::arn:aws:ssm:*:*:parameter/StableDiffusionService*",
@@ -118,10 +119,7 @@ class ServicePipelineStack(cdk.Stack):
         )
         cdk_nag.NagSuppressions.add_resource_suppressions_by_path(
             self,
-            (
-                f"/{config['CONFIG']['repository_name']}ServiceStack/"
-                "Pipeline/Pipeline/Build/Synth/CdkBuildProject/Resource"
-            ),
+            f"{base}/Pipeline/Build/Synth/CdkBuildProject/Resource",
             [
                 {
                     "id": "AwsSolutions-CB3",
@@ -135,22 +133,19 @@ class ServicePipelineStack(cdk.Stack):
         )
         cdk_nag.NagSuppressions.add_resource_suppressions_by_path(
             self,
-            (
-                f"/{config['CONFIG']['repository_name']}ServiceStack/Pipeline/UpdatePipeline/"
-                "SelfMutation/Role/DefaultPolicy/Resource"
-            ),
+            f"{base}/UpdatePipeline/SelfMutation/Role/DefaultPolicy/Resource",
             [
                 {
                     "id": "AwsSolutions-IAM5",
                     "reason": "SelfMutation role may have these wildcards.",
                     "appliesTo": [
                         (
-                            f"Resource::arn:aws:logs:{config['CONFIG']['region']}:<AWS::AccountId>:"
+                            f"Resource::arn:aws:logs:{region}:<AWS::AccountId>:"
                             "log-group:/aws/codebuild/"
                             "<PipelineUpdatePipelineSelfMutationDAA41400>:*"
                         ),
                         (
-                            f"Resource::arn:aws:codebuild:{config['CONFIG']['region']}:<AWS::AccountId>:"
+                            f"Resource::arn:aws:codebuild:{region}:<AWS::AccountId>:"
                             "report-group/<PipelineUpdatePipelineSelfMutationDAA41400>-*"
                         ),
                         "Resource::arn:aws:ssm:*:*:parameter/StableDiffusionService*",
@@ -168,10 +163,7 @@ class ServicePipelineStack(cdk.Stack):
         )
         cdk_nag.NagSuppressions.add_resource_suppressions_by_path(
             self,
-            (
-                f"/{config['CONFIG']['repository_name']}ServiceStack/"
-                "Pipeline/UpdatePipeline/SelfMutation/Resource"
-            ),
+            f"{base}/UpdatePipeline/SelfMutation/Resource",
             [
                 {
                     "id": "AwsSolutions-CB3",
@@ -193,20 +185,17 @@ class ServicePipelineStack(cdk.Stack):
             # while all steps requiring docker run in CodeBuild.
             cdk_nag.NagSuppressions.add_resource_suppressions_by_path(
                 self,
-                (
-                    f"/{config['CONFIG']['repository_name']}ServiceStack/"
-                    "Pipeline/Assets/FileRole/DefaultPolicy/Resource"
-                ),
+                f"{base}/Assets/FileRole/DefaultPolicy/Resource",
                 [
                     {
                         "id": "AwsSolutions-IAM5",
                         "reason": "Assets role may have these wildcards.",
                         "appliesTo": [
                             (
-                                f"Resource::arn:aws:logs:{config['CONFIG']['region']}:"
+                                f"Resource::arn:aws:logs:{region}:"
                                 "<AWS::AccountId>:log-group:/aws/codebuild/*"
                             ),
-                            f"Resource::arn:aws:codebuild:{config['CONFIG']['region']}:<AWS::AccountId>:report-group/*",
+                            f"Resource::arn:aws:codebuild:{region}:<AWS::AccountId>:report-group/*",
                             "Resource::*",
                             "Resource::arn:aws:ssm:*:*:parameter/StableDiffusionService*",
                             "Resource::arn:aws:s3:::jumpstart-*",
@@ -219,69 +208,60 @@ class ServicePipelineStack(cdk.Stack):
                     },
                 ],
             )
-            for file_asset_number in range(1, 5):
-                cdk_nag.NagSuppressions.add_resource_suppressions_by_path(
-                    self,
-                    (
-                        f"/{config['CONFIG']['repository_name']}ServiceStack/"
-                        f"Pipeline/Assets/FileAsset{file_asset_number}/Resource"
-                    ),
-                    [
-                        {
-                            "id": "AwsSolutions-CB4",
-                            "reason": "No KMS key required here",
-                        },
-                    ],
-                )
-                cdk_nag.NagSuppressions.add_resource_suppressions_by_path(
-                    self,
-                    (
-                        f"/{config['CONFIG']['repository_name']}ServiceStack/"
-                        f"Pipeline/Assets/FileAsset{file_asset_number}/Resource"
-                    ),
-                    [
-                        {
-                            "id": "AwsSolutions-CB3",
-                            "reason": "Build Project builds Docker image.",
-                        },
-                    ],
-                )
-                cdk_nag.NagSuppressions.add_resource_suppressions_by_path(
-                    self,
-                    (
-                        f"/{config['CONFIG']['repository_name']}ServiceStack/"
-                        "Pipeline/Pipeline/BeforeDeploy/StripAssetsFromAssembly/StripAssetsFromAssembly/"
-                        "Role/DefaultPolicy/Resource"
-                    ),
-                    [
-                        {
-                            "id": "AwsSolutions-IAM5",
-                            "reason": "StripAssetsFromAssembly role may have these wildcards.",
-                            "appliesTo": [
-                                (
-                                    f"Resource::arn:aws:logs:{config['CONFIG']['region']}:<AWS::AccountId>:log-group:/aws/"
-                                    "codebuild/<PipelineBeforeDeployStripAssetsFromAssembly3F789918>:*"
-                                ),
-                                (
-                                    f"Resource::arn:aws:codebuild:{config['CONFIG']['region']}:<AWS::AccountId>:"
-                                    "report-group/<PipelineBeforeDeployStripAssetsFromAssembly3F789918>-*"
-                                ),
-                                "Resource::arn:aws:s3:::jumpstart-*",
-                                "Resource::arn:aws:s3:::sagemaker-*",
-                                "Action::s3:Abort*",
-                                "Action::s3:DeleteObject*",
-                                "Action::s3:GetBucket*",
-                                "Action::s3:GetObject*",
-                                "Action::s3:List*",
-                                "Resource::<PipelineArtifactsBucketAEA9A052.Arn>/*",
-                            ],
-                        },
-                    ],
-                )
+            # One suppression over the Assets subtree covers every FileAsset
+            # build project; the per-asset loop cost one construct-tree
+            # traversal per call for identical payloads.
+            cdk_nag.NagSuppressions.add_resource_suppressions_by_path(
+                self,
+                f"{base}/Assets",
+                [
+                    {
+                        "id": "AwsSolutions-CB3",
+                        "reason": "Build Project builds Docker image.",
+                    },
+                    {
+                        "id": "AwsSolutions-CB4",
+                        "reason": "No KMS key required here",
+                    },
+                ],
+                apply_to_children=True,
+            )
             cdk_nag.NagSuppressions.add_resource_suppressions_by_path(
                 self,
                 (
-                    f"/{config['CONFIG']['repository_name']}ServiceStack/Pipeline/Pipeline/"
+                    f"{base}/"
+                    "Pipeline/BeforeDeploy/StripAssetsFromAssembly/StripAssetsFromAssembly/"
+                    "Role/DefaultPolicy/Resource"
+                ),
+                [
+                    {
+                        "id": "AwsSolutions-IAM5",
+                        "reason": "StripAssetsFromAssembly role may have these wildcards.",
+                        "appliesTo": [
+                            (
+                                f"Resource::arn:aws:logs:{region}:<AWS::AccountId>:log-group:/aws/"
+                                "codebuild/<PipelineBeforeDeployStripAssetsFromAssembly3F789918>:*"
+                            ),
+                            (
+                                f"Resource::arn:aws:codebuild:{region}:<AWS::AccountId>:"
+                                "report-group/<PipelineBeforeDeployStripAssetsFromAssembly3F789918>-*"
+                            ),
+                            "Resource::arn:aws:s3:::jumpstart-*",
+                            "Resource::arn:aws:s3:::sagemaker-*",
+                            "Action::s3:Abort*",
+                            "Action::s3:DeleteObject*",
+                            "Action::s3:GetBucket*",
+                            "Action::s3:GetObject*",
+                            "Action::s3:List*",
+                            "Resource::<PipelineArtifactsBucketAEA9A052.Arn>/*",
+                        ],
+                    },
+                ],
+            )
+            cdk_nag.NagSuppressions.add_resource_suppressions_by_path(
+                self,
+                (
+                    f"{base}/Pipeline/"
                     "BeforeDeploy/StripAssetsFromAssembly/StripAssetsFromAssembly/Resource"
                 ),
                 [
@@ -306,7 +286,7 @@ class ServicePipelineStack(cdk.Stack):
         super().__init__(scope, construct_id, **kwargs)
         repository_source = pipelines.CodePipelineSource.code_commit(
             repository,
-            branch=config["CONFIG"]["repository_branch"],
+            branch=CONFIG.repository_branch,
         )
 
         codebuild_role_policies = [
@@ -318,24 +298,47 @@ class ServicePipelineStack(cdk.Stack):
         ]
         code_build_defaults = pipelines.CodeBuildOptions(
             build_environment=codebuild.BuildEnvironment(
-                compute_type=codebuild.ComputeType.MEDIUM,
-                build_image=codebuild.LinuxBuildImage.STANDARD_5_0,
+                # Graviton build hosts run the Python/Node-heavy synth at
+                # better price-performance than the x86_64 STANDARD images.
+                compute_type=codebuild.ComputeType.SMALL,
+                build_image=codebuild.LinuxArmBuildImage.AMAZON_LINUX_2_STANDARD_3_0,
                 privileged=True,  # See: https://github.com/aws/aws-cdk/issues/9217
             ),
             role_policy=codebuild_role_policies,
+            # Local caching keeps the npm, Poetry, and pip downloads plus
+            # Docker layers from being re-fetched on every run; warm builds
+            # spend their time on synth instead of on the network.
+            cache=codebuild.Cache.local(
+                codebuild.LocalCacheMode.CUSTOM,
+                codebuild.LocalCacheMode.DOCKER_LAYER,
+                codebuild.LocalCacheMode.SOURCE,
+            ),
+            partial_build_spec=codebuild.BuildSpec.from_object(
+                {
+                    "cache": {
+                        "paths": [
+                            "/root/.cache/pip/**/*",
+                            "/root/.npm/**/*",
+                            "/root/.local/share/pypoetry/**/*",
+                        ],
+                    },
+                }
+            ),
         )
 
         install_commands = [
-            "npm install -g aws-cdk",
-            "curl -sSL https://install.python-poetry.org | python3 -",
-            "~/.local/share/pypoetry/venv/bin/poetry install",
+            # Skip the installer downloads when the cached tools are present.
+            "which cdk || npm install -g aws-cdk",
+            "test -x ~/.local/share/pypoetry/venv/bin/poetry"
+            " || curl -sSL https://install.python-poetry.org | python3 -",
+            "~/.local/share/pypoetry/venv/bin/poetry install --no-interaction",
         ]
         commands = ["~/.local/share/pypoetry/venv/bin/poetry run cdk synth"]
 
         pipeline = pipelines.CodePipeline(
             scope=self,
             id="Pipeline",
-            pipeline_name=f'{config["CONFIG"]["repository_name"]}ServicePipeline',
+            pipeline_name=f"{CONFIG.repository_name}ServicePipeline",
             code_build_defaults=code_build_defaults,
             docker_enabled_for_self_mutation=True,
             docker_enabled_for_synth=True,
@@ -372,11 +375,21 @@ class ServicePipelineStack(cdk.Stack):
             pipeline.add_stage(
                 ServiceStage(
                     self,
-                    f'{config["CONFIG"]["repository_name"]}Test',
+                    f"{CONFIG.repository_name}Test",
                 )
             )
             pipeline.build_pipeline()
             pipeline.pipeline.artifact_bucket.grant_write(strip_assets_step.project)
         else:
             pipeline.build_pipeline()
+
+        # Run the pipeline as V2 in QUEUED mode: pushes that arrive while a
+        # run is in flight queue up instead of each starting a full run, so
+        # rapid commits no longer burn a CodeBuild minute apiece. The pinned
+        # aws-cdk-lib predates the typed PipelineType/ExecutionMode props, so
+        # the properties are set on the L1 resource directly.
+        cfn_pipeline = pipeline.pipeline.node.default_child
+        cfn_pipeline.add_property_override("PipelineType", "V2")
+        cfn_pipeline.add_property_override("ExecutionMode", "QUEUED")
+
         self.add_cdk_nag_suppressions()
@@ -2,11 +2,51 @@
 """ Script to generate images after stacks have been deployed successfully.
 """
 import argparse
+import concurrent.futures
+import functools
+import json
 import pathlib
 from typing import cast, Any, Dict, TypedDict
 
 import boto3
-import tomli
+import botocore.config
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python < 3.11
+    import tomli as tomllib
+
+
+# TCP keep-alive and the adaptive retry mode keep scripted loops from paying
+# a fresh TLS handshake (or tripping throttling) on every call.
+_CLIENT_CONFIG = botocore.config.Config(
+    tcp_keepalive=True,
+    max_pool_connections=16,
+    retries={"mode": "adaptive", "max_attempts": 5},
+)
+
+
+@functools.lru_cache(maxsize=None)
+def get_client(service_name: str, region_name: str):
+    """
+    Get a shared boto3 client for the given service and region, creating it
+    on first use. Long-running processes that call into this script reuse the
+    clients (and their connection pools) instead of rebuilding them per call.
+
+    Parameters:
+    -----------
+    service_name : str
+        The boto3 service name, e.g. "s3"
+    region_name : str
+        The region from config.toml, e.g. "eu-central-1"
+
+    Returns:
+    --------
+    The shared client for the given service and region.
+    """
+    return boto3.client(
+        service_name=service_name, region_name=region_name, config=_CLIENT_CONFIG
+    )
 
 
 class Parameters(TypedDict):
@@ -31,15 +71,18 @@ def get_config() -> Dict[str, Any]:
         file=pathlib.Path(__file__).parent.parent / "config" / "config.toml",
         mode="rb",
     ) as config_file:
-        return tomli.load(config_file)
+        return tomllib.load(config_file)
 
 
+@functools.lru_cache(maxsize=None)
 def get_parameters(
     region: str,
     repository_name: str,
 ) -> Parameters:
     """
-    Get parameters from SSM
+    Get parameters from SSM. The result is cached per region and repository,
+    so repeated calls within one process (e.g. batch submissions) cost a
+    single SSM round-trip.
 
     Parameters:
     -----------
@@ -53,16 +96,13 @@ def get_parameters(
     Parameters
         The parameters required to start an inference.
     """
-    ssm_client = boto3.client(service_name="ssm", region_name=region)
-    get_parameters_response = ssm_client.get_parameters_by_path(
-        Path=f"/simple-gen-ai-service/{repository_name}/"
+    ssm_client = get_client(service_name="ssm", region_name=region)
+    get_parameter_response = ssm_client.get_parameter(
+        Name=f"/simple-gen-ai-service/{repository_name}/endpoint"
     )
     return cast(
         Parameters,
-        {
-            parameter["Name"].split("/")[-1]: parameter["Value"]
-            for parameter in get_parameters_response["Parameters"]
-        },
+        json.loads(get_parameter_response["Parameter"]["Value"]),
     )
 
 
@@ -91,17 +131,29 @@ def start_async_image_generation(
     inference_id : str
         The id of the started inference
     """
-    sagemaker_runtime_client = boto3.client(
+    sagemaker_runtime_client = get_client(
         service_name="sagemaker-runtime", region_name=region_name
     )
-    s3_client = boto3.client(service_name="s3", region_name=region_name)
+    s3_client = get_client(service_name="s3", region_name=region_name)
     request_input_file = pathlib.Path(request_input_file_path)
     file_key = "requests/" + request_input_file.name
-    s3_client.upload_file(
-        Filename=request_input_file_path,
-        Bucket=bucket_name,
-        Key=file_key,
-    )
+    if request_input_file.stat().st_size < 5 * 1024 * 1024:
+        # Request inputs are small JSON documents; a single put_object skips
+        # the transfer manager's worker threads and extra round-trips that
+        # upload_file spins up for multi-part support.
+        with request_input_file.open(mode="rb") as request_file:
+            s3_client.put_object(
+                Bucket=bucket_name,
+                Key=file_key,
+                Body=request_file,
+                ContentType="application/json",
+            )
+    else:
+        s3_client.upload_file(
+            Filename=request_input_file_path,
+            Bucket=bucket_name,
+            Key=file_key,
+        )
     invoke_response = sagemaker_runtime_client.invoke_endpoint_async(
         EndpointName=endpoint_name,
         InputLocation=f"s3://{bucket_name}/{file_key}",
@@ -115,7 +167,8 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "--request-input-file",
-        help="full path to inference request input file",
+        help="full path(s) to inference request input file(s)",
+        nargs="+",
         required=True,
     )
     args = parser.parse_args()
@@ -125,18 +178,33 @@ if __name__ == "__main__":
         region=config["CONFIG"]["region"],
         repository_name=config["CONFIG"]["repository_name"],
     )
-    inference_id = start_async_image_generation(
-        bucket_name=parameters["bucketName"],
-        endpoint_name=parameters["endpointName"],
-        region_name=config["CONFIG"]["region"],
-        request_input_file_path=args.request_input_file,
-    )
 
+    # Submit all requests concurrently: the S3 upload and invoke round-trips
+    # for the files overlap instead of running back to back. The clients from
+    # get_client() are thread-safe and shared across the workers.
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(8, len(args.request_input_file))
+    ) as executor:
+        inference_ids = list(
+            executor.map(
+                lambda request_input_file_path: start_async_image_generation(
+                    bucket_name=parameters["bucketName"],
+                    endpoint_name=parameters["endpointName"],
+                    region_name=config["CONFIG"]["region"],
+                    request_input_file_path=request_input_file_path,
+                ),
+                args.request_input_file,
+            )
+        )
+
+    for inference_id in inference_ids:
+        print(
+            f"Inference was started with id: {inference_id}.\n"
+            f"Expect a result in s3://{parameters['bucketName']}/images/{inference_id}\n\n"
+            "Check for available results with:\n"
+            f"aws s3 ls s3://{parameters['bucketName']}/images/{inference_id}/\n\n"
+        )
     print(
-        f"Inference was started with id: {inference_id}.\n"
-        f"Expect a result in s3://{parameters['bucketName']}/images/{inference_id}\n\n"
-        "Check for available results with:\n"
-        f"aws s3 ls s3://{parameters['bucketName']}/images/{inference_id}/\n\n"
         "You can describe the endpoint with:\n"
         f"aws sagemaker describe-endpoint --endpoint-name {parameters['endpointName']}\n\n"
     )